@@ -1,23 +1,199 @@
-import json
+import abc
+import asyncio
+import base64
+import contextlib
+import functools
 import logging
 import os
+import threading
 import time
-from typing import Generator
+from pathlib import Path
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    BinaryIO,
+    Generator,
+    Iterable,
+    Iterator,
+)
 
 import httpx
-import jwt
+import orjson
 from config import (
     AGILETEST_AUTH_BASE_URL,
     AGILETEST_BASE_URL,
+    AGILETEST_DC_TOKEN,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONCURRENT_UPLOADS,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
     DEFAULT_TIMEOUT,
     FRAMEWORK_RESULT_FILETYPE_MAPPING,
+    MAX_RETRY_AFTER,
     MIME_TYPE_MAPPING,
     TEST_EXECUTION_TYPES,
-    AGILETEST_DC_TOKEN,
+    TOKEN_EXP_SKEW,
+    UPLOAD_CHUNK_SIZE,
 )
 from httpx import Request, Response
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", logging.INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+_REFRESH_HEADERS = {"Content-Type": MIME_TYPE_MAPPING["json"]}
+# sized so bursts of concurrent uploads reuse warm connections instead of
+# paying a new TLS handshake each time the default keep-alive pool overflows
+CLIENT_LIMITS = httpx.Limits(
+    max_connections=DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+)
+
+
+def _get_file_type_from_test_framework(framework_type: str) -> tuple[str, str]:
+    """Get file extension and mime type from test framework type.
+
+    Args:
+        framework_type (str): test framework name
+
+    Raises:
+        ValueError: if framework type or mime type is not found
+
+    Returns:
+        tuple[str, str]: extension, mime type
+    """
+    extension = FRAMEWORK_RESULT_FILETYPE_MAPPING.get(framework_type, None)
+    if extension is None:
+        raise ValueError(f"Extension not found for framework type {framework_type}")
+    mime_type = MIME_TYPE_MAPPING.get(extension, None)
+    if mime_type is None:
+        raise ValueError(f"Mime type not found for extension {extension}")
+    return extension, mime_type
+
+
+def _build_routes() -> (
+    tuple[dict[str, tuple[str, str, str]], dict[str, tuple[str, str, str, str]]]
+):
+    """Build the text and multipart upload routes of every framework type.
+
+    Returns:
+        tuple[dict, dict]: framework type -> (data center api path, cloud api path, mime type),
+            framework type -> (data center api path, cloud api path, results file name, mime type)
+    """
+    text_routes = {}
+    multipart_routes = {}
+    for framework_type in TEST_EXECUTION_TYPES:
+        extension, mime_type = _get_file_type_from_test_framework(framework_type)
+        text_routes[framework_type] = (
+            f"/rest/agiletest/1.0/test-executions/automation/{framework_type}",
+            f"/ds/test-executions/{framework_type}",
+            mime_type,
+        )
+        multipart_routes[framework_type] = (
+            f"/plugins/servlet/agiletest/automation/multipart/{framework_type}",
+            f"/ds/test-executions/{framework_type}/multipart",
+            f"results.{extension}",
+            mime_type,
+        )
+    return text_routes, multipart_routes
+
+
+# Routes are resolved once at import, which also validates the mappings, so an
+# upload only has to look its framework type up.
+_TEXT_ROUTES, _MULTIPART_ROUTES = _build_routes()
+
+
+@functools.lru_cache(maxsize=32)
+def _check_auto_test_framework_type(framework_type: str) -> str:
+    framework_type = framework_type.lower()
+    if framework_type not in _TEXT_ROUTES:
+        raise ValueError(
+            f"Invalid test execution type: {framework_type}. Supported frameworks: {TEST_EXECUTION_TYPES}"
+        )
+    return framework_type
+
+
+def _parse_token_exp(token: str) -> int | float:
+    """Read the exp claim of a JWT, 0 if it can't be read or isn't a number.
+
+    The signature isn't verified, the token is only inspected to know when to
+    refresh it, so the payload segment is decoded directly.
+    """
+    try:
+        payload = token.split(".", 2)[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = orjson.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return 0
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return 0
+    return exp
+
+
+def _get_retry_after(response: Response) -> float | None:
+    """Get the Retry-After delay of a response in seconds, if it has one."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+# test data can be given in memory, or as a path / binary file to stream from
+UploadData = str | bytes | Path | BinaryIO
+
+
+@contextlib.contextmanager
+def _open_upload_data(data: UploadData) -> Iterator[str | bytes | BinaryIO]:
+    """Open upload data for sending.
+
+    Paths are opened in binary mode for the duration of the request. Streams
+    that can't be rewound (e.g. piped stdin) are read in memory, since their
+    size can't be known up front and they couldn't be resent after a 401.
+    """
+    if isinstance(data, Path):
+        with data.open("rb") as file:
+            yield file
+    elif isinstance(data, (str, bytes)) or data.seekable():
+        yield data
+    else:
+        yield data.read()
+
+
+class _FileStream:
+    """Request body read from a seekable binary file in chunks.
+
+    Rewinds to the initial offset on each iteration so the request can be
+    replayed by the auth flow after a 401.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._offset = file.tell()
+        self.length = file.seek(0, os.SEEK_END) - self._offset
+        file.seek(self._offset)
+
+    def _read_chunk(self) -> bytes:
+        return self._file.read(UPLOAD_CHUNK_SIZE)
+
+
+class _SyncFileStream(_FileStream):
+    def __iter__(self) -> Iterator[bytes]:
+        self._file.seek(self._offset)
+        while chunk := self._read_chunk():
+            yield chunk
+
+
+class _AsyncFileStream(_FileStream):
+    """Async request body, read in a worker thread.
+
+    A large file then doesn't block the event loop, and the other in-flight
+    uploads, while it is sent.
+    """
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self._file.seek(self._offset)
+        while chunk := await asyncio.to_thread(self._read_chunk):
+            yield chunk
 
 
 class AgiletestAuth(httpx.Auth):
@@ -31,13 +207,25 @@ class AgiletestAuth(httpx.Auth):
         data_center: bool = False,
         data_center_token: str = AGILETEST_DC_TOKEN,
     ):
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         self.client_id = client_id
         self.client_secret = client_secret
         self.base_url = base_auth_url
+        # the authenticate request never changes, so its url and body are
+        # prepared once and reused for every refresh
+        self._refresh_url = httpx.URL(f"{self.base_url}/api/apikeys/authenticate")
+        self._refresh_body = orjson.dumps(
+            {"clientId": self.client_id, "clientSecret": self.client_secret}
+        )
         self.token = ""
+        self._token_exp = 0
+        # one refresh at a time, so concurrent requests don't all re-authenticate
+        self._refresh_lock = threading.Lock()
+        self._async_refresh_lock = asyncio.Lock()
         self.data_center = data_center
         self.data_center_token = data_center_token
+        # Authorization header value, rebuilt only when the token changes
+        self._auth_header = f"Bearer {data_center_token}" if data_center else ""
 
         if not self.data_center and (not self.client_id or not self.client_secret):
             raise ValueError("Client ID and Client Secret are required for Cloud version")
@@ -45,21 +233,19 @@ class AgiletestAuth(httpx.Auth):
             raise ValueError("AGILETEST_DC_TOKEN is required in Data Center mode")
 
     def _check_valid_token(self) -> bool:
-        if not self.token:
-            return False
-        try:
-            claims = jwt.decode(self.token, verify=False)
-        except jwt.DecodeError:
-            return False
-        expiration_timestamp = claims.get("exp", 0)
-        return expiration_timestamp > int(time.time())
+        # refresh slightly ahead of expiry so a token can't lapse mid-flight
+        return bool(self.token) and self._token_exp - TOKEN_EXP_SKEW > time.time()
+
+    def _needs_refresh(self) -> bool:
+        return not self.data_center and not self._check_valid_token()
 
     def build_refresh_request(self) -> Request:
-        self.logger.debug(f"Building refresh request for client id {self.client_id}")
+        self.logger.debug("Building refresh request for client id %s", self.client_id)
         return httpx.Request(
             method="POST",
-            url=f"{self.base_url}/api/apikeys/authenticate",
-            json={"clientId": self.client_id, "clientSecret": self.client_secret},
+            url=self._refresh_url,
+            content=self._refresh_body,
+            headers=_REFRESH_HEADERS,
         )
 
     def update_token(self, response: Response) -> None:
@@ -67,33 +253,96 @@ class AgiletestAuth(httpx.Auth):
             response.raise_for_status()
         except httpx.HTTPStatusError as err:
             self.logger.error(
-                f"Failed to refresh token: {response.status_code} - {response.text}"
+                "Failed to refresh token: %s - %s", response.status_code, response.text
             )
             raise err
-        self.logger.debug(f"New token: {response.text}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("New token: %s", response.text)
         self.token = str(response.text).strip()
+        self._auth_header = f"JWT {self.token}"
+        self._token_exp = _parse_token_exp(self.token)
 
-    def auth_flow(self, request: httpx.Request) -> Generator[Request, Response, None]:
-        if self.data_center:
-            request.headers["Authorization"] = f"Bearer {self.data_center_token}"
-            response = yield request
-        else:
-            if not self._check_valid_token():
+    def _sync_refresh_flow(self) -> Generator[Request, Response, None]:
+        """Refresh the token if needed, one thread at a time."""
+        if not self._needs_refresh():
+            return
+        with self._refresh_lock:
+            # re-check, another thread may have refreshed while we waited
+            if self._needs_refresh():
                 self.logger.debug("Refreshing token")
                 refresh_res = yield self.build_refresh_request()
+                refresh_res.read()
                 self.update_token(refresh_res)
 
-            request.headers["Authorization"] = f"JWT {self.token}"
-            response = yield request
-
-            if response.status_code == 401:
+    async def _async_refresh_flow(self) -> AsyncGenerator[Request, Response]:
+        """Refresh the token if needed, one task at a time."""
+        if not self._needs_refresh():
+            return
+        async with self._async_refresh_lock:
+            # re-check, another task may have refreshed while we waited
+            if self._needs_refresh():
+                self.logger.debug("Refreshing token")
                 refresh_res = yield self.build_refresh_request()
+                await refresh_res.aread()
                 self.update_token(refresh_res)
-                request.headers["Authorization"] = f"JWT {self.token}"
-                yield request
 
+    def refresh_token(self, client: httpx.Client) -> None:
+        """Refresh the token now with `client` if needed, e.g. before a burst of uploads."""
+        with contextlib.closing(self._sync_refresh_flow()) as flow:
+            try:
+                refresh_req = next(flow)
+                flow.send(client.send(refresh_req, auth=None))
+            except StopIteration:
+                pass
+
+    async def arefresh_token(self, client: httpx.AsyncClient) -> None:
+        """Refresh the token now with `client` if needed, e.g. before a burst of uploads."""
+        async with contextlib.aclosing(self._async_refresh_flow()) as flow:
+            try:
+                refresh_req = await flow.__anext__()
+                await flow.asend(await client.send(refresh_req, auth=None))
+            except StopAsyncIteration:
+                pass
+
+    def auth_flow(self, request: httpx.Request) -> Generator[Request, Response, None]:
+        # proactive refreshes happen under a lock in sync_auth_flow /
+        # async_auth_flow, this only signs the request and retries on 401
+        request.headers["Authorization"] = self._auth_header
+        response = yield request
+        if not self.data_center and response.status_code == 401:
+            refresh_res = yield self.build_refresh_request()
+            self.update_token(refresh_res)
+            request.headers["Authorization"] = self._auth_header
+            yield request
+
+    def sync_auth_flow(
+        self, request: httpx.Request
+    ) -> Generator[Request, Response, None]:
+        yield from self._sync_refresh_flow()
+        yield from super().sync_auth_flow(request)
+
+    async def async_auth_flow(
+        self, request: httpx.Request
+    ) -> AsyncGenerator[Request, Response]:
+        for flow in (self._async_refresh_flow(), super().async_auth_flow(request)):
+            async with contextlib.aclosing(flow):
+                try:
+                    next_request = await flow.__anext__()
+                except StopAsyncIteration:
+                    continue
+                while True:
+                    response = yield next_request
+                    try:
+                        next_request = await flow.asend(response)
+                    except StopAsyncIteration:
+                        break
+
+
+class _AgiletestHelperBase(abc.ABC):
+    """Request building and response handling shared by the sync and async helpers."""
+
+    _file_stream: type[_FileStream]
 
-class AgiletestHelper:
     def __init__(
         self,
         client_id: str,
@@ -104,8 +353,7 @@ class AgiletestHelper:
         data_center: bool = False,
         data_center_token: str = AGILETEST_DC_TOKEN,
     ):
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(LOG_LEVEL)
+        self.logger = logger
         self.base_url = base_url
         self.timeout = timeout
         self.auth = AgiletestAuth(
@@ -118,161 +366,329 @@ class AgiletestHelper:
         self.client = self._get_client()
         self.data_center = data_center
 
-    def _get_client(self) -> httpx.Client:
-        return httpx.Client(
-            auth=self.auth, base_url=self.base_url, timeout=self.timeout
-        )
+    @abc.abstractmethod
+    def _get_client(self) -> httpx.Client | httpx.AsyncClient:
+        """Build the http client used to send requests."""
 
-    def _check_response(self, response: Response, json_check: bool = True) -> bool:
+    def _check_response(self, response: Response) -> dict | None:
+        """Check response status and parse its JSON body.
+
+        Returns:
+            dict | None: parsed response body, None if the request failed
+        """
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as err:
             self.logger.error(
-                f"Request Error: {err} - {response.status_code} - {response.text}"
+                "Request Error: %s - %s - %s", err, response.status_code, response.text
             )
-            return False
-        if json_check:
-            try:
-                response.json()
-            except json.decoder.JSONDecodeError as err:
-                self.logger.error(
-                    f"Response invalid JSON response: {err} - {response.text}"
-                )
-                return False
-        return True
-
-    @staticmethod
-    def _check_auto_test_framework_type(framework_type: str) -> str:
-        framework_type = framework_type.lower()
-        if framework_type not in TEST_EXECUTION_TYPES:
-            raise ValueError(
-                f"Invalid test execution type: {framework_type}. Supported frameworks: {TEST_EXECUTION_TYPES}"
+            return None
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as err:
+            self.logger.error(
+                "Response invalid JSON response: %s - %s", err, response.text
             )
-        return framework_type
+            return None
 
-    def upload_test_execution_text_data(
+    def _build_text_data_request(
         self,
         framework_type: str,
         project_key: str,
-        test_data: str,
+        test_data: str | bytes | BinaryIO,
         test_execution_key: str = "",
-    ) -> bool | dict:
-        """Upload test execution to Agiletest.
-
-        Args:
-            framework_type (str): framework type
-            project_key (str): project key
-            test_data (str): test execution data
-            test_execution_key (str, optional): test execution jira issue key to import to. Defaults to "".
+    ) -> Request:
+        """Build the request for a text data upload.
 
-        Raises:
-            ValueError: framework type not supported
+        File objects are sent as a chunked read from disk rather than loaded
+        in memory.
 
         Returns:
-            bool | dict: false if failed, dict with response if success
+            Request: request to send with the helper client
         """
-        framework_type = self._check_auto_test_framework_type(framework_type)
-
-        if self.data_center:
-            apiPath = f"/rest/agiletest/1.0/test-executions/automation/{framework_type}"
-        else:
-            apiPath = f"/ds/test-executions/{framework_type}"
+        framework_type = _check_auto_test_framework_type(framework_type)
+        dc_api_path, api_path, mime_type = _TEXT_ROUTES[framework_type]
+        apiPath = dc_api_path if self.data_center else api_path
 
         params = {"projectKey": project_key}
         if test_execution_key:
             params["testExecutionKey"] = test_execution_key
 
-        _, mime_type = self._get_file_type_from_test_framework(framework_type)
         headers = {"Content-Type": mime_type}
-        res = self.client.post(
-            apiPath,
-            params=params,
-            headers=headers,
-            content=test_data,
+        if not isinstance(test_data, (str, bytes)):
+            test_data = self._file_stream(test_data)
+            headers["Content-Length"] = str(test_data.length)
+        return self.client.build_request(
+            "POST", apiPath, params=params, headers=headers, content=test_data
         )
-        result = self._check_response(res)
-        if not result:
-            return result
-        self.logger.info(f"Test execution uploaded successfully: '{res.text}'")
-        res_json: dict = res.json()
+
+    def _build_multipart_request(
+        self,
+        framework_type: str,
+        test_results: str | bytes | BinaryIO,
+        test_execution_info: str | bytes | BinaryIO,
+    ) -> Request:
+        """Build the request for a multipart upload.
+
+        Returns:
+            Request: request to send with the helper client
+        """
+        framework_type = _check_auto_test_framework_type(framework_type)
+        dc_api_path, api_path, tr_filename, tr_mime_type = _MULTIPART_ROUTES[
+            framework_type
+        ]
+        apiPath = dc_api_path if self.data_center else api_path
+        files = {
+            "results": (tr_filename, test_results, tr_mime_type),
+            "testExecution": (
+                "info.json",  # currently only json is supported
+                test_execution_info,
+                MIME_TYPE_MAPPING["json"],
+            ),
+        }
+        return self.client.build_request("POST", apiPath, files=files)
+
+    def _handle_upload_response(self, res: Response) -> bool | dict:
+        res_json = self._check_response(res)
+        if res_json is None:
+            return False
+
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Test execution uploaded successfully: '%s'", res.text)
         test_execution_key = res_json.get("key", "")
         test_execution_url = res_json.get("url", "")
         missed_cases = res_json.get("missedCases", [])
         if missed_cases:
             self.logger.warning(
-                f"Test execution {test_execution_key} with missed test cases: {missed_cases}"
+                "Test execution %s with missed test cases: %s",
+                test_execution_key,
+                missed_cases,
             )
         self.logger.info(
-            f"Test Execution issue updated: {test_execution_key} {test_execution_url}"
+            "Test Execution issue updated: %s %s",
+            test_execution_key,
+            test_execution_url,
         )
         return res_json
 
-    @staticmethod
-    def _get_file_type_from_test_framework(framework_type: str) -> tuple[str, str]:
-        """Get file extension and mime type from test framework type.
+
+class AgiletestHelper(_AgiletestHelperBase):
+    client: httpx.Client
+    _file_stream = _SyncFileStream
+
+    def _get_client(self) -> httpx.Client:
+        return httpx.Client(
+            auth=self.auth,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=CLIENT_LIMITS,
+            http2=True,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+    def prewarm_auth(self) -> None:
+        """Fetch a token up front, before a burst of uploads needs it."""
+        self.auth.refresh_token(self.client)
+
+    def __enter__(self) -> "AgiletestHelper":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def upload_test_execution_text_data(
+        self,
+        framework_type: str,
+        project_key: str,
+        test_data: UploadData,
+        test_execution_key: str = "",
+    ) -> bool | dict:
+        """Upload test execution to Agiletest.
 
         Args:
-            framework_type (str): test framework name
+            framework_type (str): framework type
+            project_key (str): project key
+            test_data (UploadData): test execution data, or a path / binary file to stream it from
+            test_execution_key (str, optional): test execution jira issue key to import to. Defaults to "".
 
         Raises:
-            ValueError: if framework type or mime type is not found
+            ValueError: framework type not supported
 
         Returns:
-            tuple[str, str]: extension, mime type
+            bool | dict: false if failed, dict with response if success
         """
-        extension = FRAMEWORK_RESULT_FILETYPE_MAPPING.get(framework_type, None)
-        if extension is None:
-            raise ValueError(f"Extension not found for framework type {framework_type}")
-        mime_type = MIME_TYPE_MAPPING.get(extension, None)
-        if mime_type is None:
-            raise ValueError(f"Mime type not found for extension {extension}")
-        return extension, mime_type
+        with _open_upload_data(test_data) as content:
+            request = self._build_text_data_request(
+                framework_type, project_key, content, test_execution_key
+            )
+            res = self.client.send(request)
+        return self._handle_upload_response(res)
 
     def upload_test_execution_multipart(
         self,
         framework_type: str,
-        test_results: str,
-        test_execution_info: str,
+        test_results: UploadData,
+        test_execution_info: UploadData,
     ) -> bool | dict:
-        framework_type = self._check_auto_test_framework_type(framework_type)
-        tr_extension, tr_mime_type = self._get_file_type_from_test_framework(
-            framework_type
-        )
-        files = {
-            "results": (
-                f"results.{tr_extension}",
-                test_results,
-                tr_mime_type,
-            ),
-            "testExecution": (
-                "info.json",  # currently only json is supported
-                test_execution_info,
-                MIME_TYPE_MAPPING["json"],
-            ),
-        }
-     
-        if self.data_center:
-            apiPath = f"/plugins/servlet/agiletest/automation/multipart/{framework_type}"
-        else:
-            apiPath = f"/ds/test-executions/{framework_type}/multipart"
-        res = self.client.post(
-            apiPath,
-            files=files,
+        with (
+            _open_upload_data(test_results) as results,
+            _open_upload_data(test_execution_info) as info,
+        ):
+            request = self._build_multipart_request(framework_type, results, info)
+            res = self.client.send(request)
+        return self._handle_upload_response(res)
+
+
+class AsyncAgiletestHelper(_AgiletestHelperBase):
+    """Asyncio variant of `AgiletestHelper`.
+
+    Lets many uploads share one event loop and connection pool instead of a
+    thread per in-flight request. Authentication goes through
+    `AgiletestAuth.async_auth_flow`, which serializes token refreshes with an
+    asyncio lock.
+
+    Text data files are streamed from a worker thread, but some file work still
+    happens on the event loop: paths are opened there, unseekable streams are
+    read in memory there, and httpx reads multipart files synchronously.
+    """
+
+    client: httpx.AsyncClient
+    _file_stream = _AsyncFileStream
+    # monotonic time before which uploads hold off, set from 429 Retry-After
+    _retry_at = 0.0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            auth=self.auth,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=CLIENT_LIMITS,
+            http2=True,
         )
-        result = self._check_response(res)
-        if not result:
-            return result
 
-        self.logger.info(f"Test execution uploaded successfully: '{res.text}'")
-        res_json: dict = res.json()
-        test_execution_key = res_json.get("key", "")
-        test_execution_url = res_json.get("url", "")
-        missed_cases = res_json.get("missedCases", [])
-        if missed_cases:
-            self.logger.warning(
-                f"Test execution {test_execution_key} with missed test cases: {missed_cases}"
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def prewarm_auth(self) -> None:
+        """Fetch a token up front, before a burst of uploads needs it."""
+        await self.auth.arefresh_token(self.client)
+
+    async def _send(self, request: Request) -> Response:
+        """Send a request, holding off while the API asked us to back off."""
+        delay = self._retry_at - time.monotonic()
+        if delay > 0:
+            self.logger.debug("Rate limited, waiting %.2fs before sending", delay)
+            await asyncio.sleep(delay)
+        res = await self.client.send(request)
+        if res.status_code == 429:
+            retry_after = _get_retry_after(res)
+            if retry_after is not None:
+                # a bogus or huge Retry-After mustn't stall every later upload
+                retry_after = min(max(retry_after, 0.0), MAX_RETRY_AFTER)
+                self.logger.warning(
+                    "Rate limited by the API, backing off for %.2fs", retry_after
+                )
+                self._retry_at = max(self._retry_at, time.monotonic() + retry_after)
+        return res
+
+    async def __aenter__(self) -> "AsyncAgiletestHelper":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def upload_test_execution_text_data(
+        self,
+        framework_type: str,
+        project_key: str,
+        test_data: UploadData,
+        test_execution_key: str = "",
+    ) -> bool | dict:
+        """Upload test execution to Agiletest.
+
+        Args:
+            framework_type (str): framework type
+            project_key (str): project key
+            test_data (UploadData): test execution data, or a path / binary file to stream it from
+            test_execution_key (str, optional): test execution jira issue key to import to. Defaults to "".
+
+        Raises:
+            ValueError: framework type not supported
+
+        Returns:
+            bool | dict: false if failed, dict with response if success
+        """
+        with _open_upload_data(test_data) as content:
+            request = self._build_text_data_request(
+                framework_type, project_key, content, test_execution_key
             )
-        self.logger.info(
-            f"Test Execution issue updated: {test_execution_key} {test_execution_url}"
+            res = await self._send(request)
+        return self._handle_upload_response(res)
+
+    async def upload_test_execution_multipart(
+        self,
+        framework_type: str,
+        test_results: UploadData,
+        test_execution_info: UploadData,
+    ) -> bool | dict:
+        with (
+            _open_upload_data(test_results) as results,
+            _open_upload_data(test_execution_info) as info,
+        ):
+            request = self._build_multipart_request(framework_type, results, info)
+            res = await self._send(request)
+        return self._handle_upload_response(res)
+
+    async def upload_test_execution_multipart_many(
+        self,
+        framework_type: str,
+        uploads: Iterable[tuple[UploadData, UploadData]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENT_UPLOADS,
+    ) -> list[bool | dict | Exception]:
+        """Upload several multipart test executions concurrently.
+
+        The API needs the results and info of a test execution in one multipart
+        request, so each upload stays a single POST. Up to `max_concurrency`
+        uploads run side by side on the shared client, and an upload only opens
+        its files once it gets a slot, so a large batch can't run out of file
+        descriptors.
+
+        A failing upload doesn't cancel the others: an exception raised by one
+        upload (transport error, unreadable file...) is returned in its slot
+        instead of being raised.
+
+        Args:
+            framework_type (str): framework type
+            uploads (Iterable[tuple[UploadData, UploadData]]): (test results, test execution info) pairs
+            max_concurrency (int, optional): uploads in flight at once. Defaults to DEFAULT_MAX_CONCURRENT_UPLOADS.
+
+        Raises:
+            ValueError: framework type not supported, or max_concurrency below 1
+
+        Returns:
+            list[bool | dict | Exception]: result or exception of each upload, in order
+        """
+        framework_type = _check_auto_test_framework_type(framework_type)
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def upload(
+            test_results: UploadData, test_execution_info: UploadData
+        ) -> bool | dict:
+            async with semaphore:
+                return await self.upload_test_execution_multipart(
+                    framework_type, test_results, test_execution_info
+                )
+
+        return await asyncio.gather(
+            *(
+                upload(test_results, test_execution_info)
+                for test_results, test_execution_info in uploads
+            ),
+            return_exceptions=True,
         )
-        return res_json
@@ -1,4 +1,3 @@
-import sys
 import typing
 
 import click
@@ -28,14 +27,14 @@ def test_execution(ctx: click.Context):
     required=False,
     default="",
 )
-@click.argument("input_file", type=click.File(mode="r"), default=sys.stdin)
+@click.argument("input_file", type=click.File(mode="rb"), default="-")
 @click.pass_context
 def import_test_execution(
     ctx: click.Context,
     framework_type: str,
     project_key: str,
     test_execution_key: str,
-    input_file: typing.TextIO,
+    input_file: typing.BinaryIO,
 ):
     """Import a test execution result."""
     logger = utils.get_logger_from_click_ctx(ctx)
@@ -44,12 +43,11 @@ def import_test_execution(
         msg += f" - Test Execution '{test_execution_key}'"
     logger.info(msg)
 
-    input_text = input_file.read()
     helper = utils.get_agiletest_helper_from_click_ctx(ctx)
     result = helper.upload_test_execution_text_data(
         framework_type=framework_type,
         project_key=project_key,
-        test_data=input_text,
+        test_data=input_file,
         test_execution_key=test_execution_key,
     )
     if not result:
@@ -63,15 +61,15 @@ def import_test_execution(
     "-t", "--framework-type", required=True, type=click.Choice(TEST_EXECUTION_TYPES)
 )
 @click.option(
-    "-i", "--test-info", type=click.File(mode="r"), default=sys.stdin, required=True
+    "-i", "--test-info", type=click.File(mode="rb"), default="-", required=True
 )
-@click.argument("test_result", type=click.File(mode="r"), default=sys.stdin)
+@click.argument("test_result", type=click.File(mode="rb"), default="-")
 @click.pass_context
 def import_test_execution_multipart(
     ctx: click.Context,
     framework_type: str,
-    test_info: typing.TextIO,
-    test_result: typing.TextIO,
+    test_info: typing.BinaryIO,
+    test_result: typing.BinaryIO,
 ):
     """Import a test execution result in multipart format."""
     logger = utils.get_logger_from_click_ctx(ctx)
@@ -79,13 +77,11 @@ def import_test_execution_multipart(
         f"Importing test execution for '{framework_type}' framework in multipart"
     )
 
-    test_result_text = test_result.read()
-    test_info_text = test_info.read()
     helper = utils.get_agiletest_helper_from_click_ctx(ctx)
     result = helper.upload_test_execution_multipart(
         framework_type=framework_type,
-        test_results=test_result_text,
-        test_execution_info=test_info_text,
+        test_results=test_result,
+        test_execution_info=test_info,
     )
     if not result:
         logger.error("Failed to import test execution multipart")
@@ -35,3 +35,11 @@ LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
 DEBUG_LOG_FORMAT = "%(asctime)s [%(levelname)s] %(filename)s:%(lineno)s - %(message)s"
 TRACEBACK_LIMIT = 5
 DEFAULT_TIMEOUT = 30
+TOKEN_EXP_SKEW = 30
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_RETRY_AFTER = 60
+DEFAULT_MAX_CONNECTIONS = 1000
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 100
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+# each concurrent upload holds up to two open files and a connection
+DEFAULT_MAX_CONCURRENT_UPLOADS = 32
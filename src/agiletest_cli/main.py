@@ -59,7 +59,7 @@ def cli(
     # ensure that ctx.obj exists and is a dict (in case `cli()` is called
     # by means other than the `if` block below)
     ctx.ensure_object(dict)
-    ctx.obj[ClickContextConst.AGILETEST_HELPER] = AgiletestHelper(
+    helper = AgiletestHelper(
         client_id=client_id,
         client_secret=client_secret,
         base_url=base_url,
@@ -68,6 +68,8 @@ def cli(
         data_center=data_center,
         data_center_token=data_center_token,
     )
+    ctx.call_on_close(helper.close)
+    ctx.obj[ClickContextConst.AGILETEST_HELPER] = helper
     ctx.obj[ClickContextConst.LOGGER] = logging.getLogger(__name__)
 
 
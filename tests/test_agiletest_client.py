@@ -0,0 +1,462 @@
+import asyncio
+import base64
+import contextlib
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+from agiletest_cli import agiletest_client
+from agiletest_cli.agiletest_client import (
+    AgiletestHelper,
+    AsyncAgiletestHelper,
+    _parse_token_exp,
+)
+
+TEST_BASE_URL = "https://api.agiletest.test"
+TEST_AUTH_BASE_URL = "https://jira.agiletest.test"
+TEST_FRAMEWORK = "junit"
+TEST_PROJECT_KEY = "TC"
+TEST_FILE_PATH = Path("tests/junit-test-data.xml")
+
+
+def make_token(claims: dict) -> str:
+    def encode(segment: dict) -> str:
+        return base64.urlsafe_b64encode(orjson.dumps(segment)).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(claims)}.signature"
+
+
+class FakeAgiletest(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """In-process stand-in for the Agiletest API.
+
+    Unlike `httpx.MockTransport`, request bodies are consumed by iterating the
+    request stream as a real transport does, so a replayed request really has
+    to rewind its body.
+    """
+
+    def __init__(
+        self,
+        upload_statuses: list[int] | None = None,
+        token_claims: dict | None = None,
+        retry_after: str | None = None,
+    ):
+        self.auth_calls = 0
+        self._lock = threading.Lock()
+        self.token_claims = token_claims
+        self.retry_after = retry_after
+        self.upload_times: list[float] = []
+        self.uploads: list[httpx.Request] = []
+        self.bodies: list[bytes] = []
+        # statuses returned to the next uploads, 200 once exhausted
+        self.upload_statuses = list(upload_statuses or [])
+
+    def handle(self, request: httpx.Request, body: bytes) -> httpx.Response:
+        with self._lock:
+            if request.url.path == "/api/apikeys/authenticate":
+                self.auth_calls += 1
+                claims = self.token_claims
+                if claims is None:
+                    claims = {"exp": int(time.time()) + 3600}
+                return httpx.Response(200, text=make_token(claims))
+            self.uploads.append(request)
+            self.bodies.append(body)
+            self.upload_times.append(time.monotonic())
+            status = self.upload_statuses.pop(0) if self.upload_statuses else 200
+            headers = {}
+            if status == 429 and self.retry_after is not None:
+                headers["Retry-After"] = self.retry_after
+            return httpx.Response(
+                status, headers=headers, json={"key": f"TC-{len(self.uploads)}"}
+            )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.handle(request, b"".join(request.stream))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return self.handle(request, b"".join([chunk async for chunk in request.stream]))
+
+
+def make_helper(transport: httpx.BaseTransport) -> AgiletestHelper:
+    class FakeAgiletestHelper(AgiletestHelper):
+        def _get_client(self) -> httpx.Client:
+            return httpx.Client(
+                auth=self.auth, base_url=self.base_url, transport=transport
+            )
+
+    return FakeAgiletestHelper(
+        client_id="client-id",
+        client_secret="client-secret",
+        base_url=TEST_BASE_URL,
+        base_auth_url=TEST_AUTH_BASE_URL,
+    )
+
+
+def make_async_helper(transport: httpx.AsyncBaseTransport) -> AsyncAgiletestHelper:
+    class FakeAsyncAgiletestHelper(AsyncAgiletestHelper):
+        def _get_client(self) -> httpx.AsyncClient:
+            return httpx.AsyncClient(
+                auth=self.auth, base_url=self.base_url, transport=transport
+            )
+
+    return FakeAsyncAgiletestHelper(
+        client_id="client-id",
+        client_secret="client-secret",
+        base_url=TEST_BASE_URL,
+        base_auth_url=TEST_AUTH_BASE_URL,
+    )
+
+
+@pytest.fixture
+def pipe_file():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, TEST_FILE_PATH.read_bytes())
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as file:
+        yield file
+
+
+def test_upload_path():
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        result = helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, TEST_FILE_PATH
+        )
+
+    assert result == {"key": "TC-1"}
+    assert transport.bodies == [TEST_FILE_PATH.read_bytes()]
+    assert transport.uploads[0].headers["Content-Length"] == str(
+        TEST_FILE_PATH.stat().st_size
+    )
+
+
+def test_upload_file_from_offset():
+    data = TEST_FILE_PATH.read_bytes()
+    file = io.BytesIO(data)
+    file.seek(10)
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        helper.upload_test_execution_text_data(TEST_FRAMEWORK, TEST_PROJECT_KEY, file)
+
+    assert transport.bodies == [data[10:]]
+    assert transport.uploads[0].headers["Content-Length"] == str(len(data) - 10)
+
+
+def test_upload_unseekable_stream(pipe_file):
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, pipe_file
+        )
+
+    assert transport.bodies == [TEST_FILE_PATH.read_bytes()]
+    assert transport.uploads[0].headers["Content-Length"] == str(
+        TEST_FILE_PATH.stat().st_size
+    )
+
+
+def test_upload_replayed_after_401():
+    transport = FakeAgiletest(upload_statuses=[401])
+    with make_helper(transport) as helper:
+        result = helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, TEST_FILE_PATH
+        )
+
+    assert result == {"key": "TC-2"}
+    assert transport.auth_calls == 2
+    assert transport.bodies == [TEST_FILE_PATH.read_bytes()] * 2
+
+
+def test_async_upload_replayed_after_401():
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return await helper.upload_test_execution_text_data(
+                TEST_FRAMEWORK, TEST_PROJECT_KEY, TEST_FILE_PATH
+            )
+
+    transport = FakeAgiletest(upload_statuses=[401])
+    result = asyncio.run(main())
+
+    assert result == {"key": "TC-2"}
+    assert transport.bodies == [TEST_FILE_PATH.read_bytes()] * 2
+
+
+def test_async_upload_reads_file_off_the_event_loop():
+    class ThreadRecordingFile(io.BytesIO):
+        def read(self, size: int = -1) -> bytes:
+            read_threads.add(threading.get_ident())
+            return super().read(size)
+
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return await helper.upload_test_execution_text_data(
+                TEST_FRAMEWORK, TEST_PROJECT_KEY, file
+            )
+
+    read_threads = set()
+    file = ThreadRecordingFile(TEST_FILE_PATH.read_bytes())
+    transport = FakeAgiletest()
+    result = asyncio.run(main())
+
+    assert result == {"key": "TC-1"}
+    assert transport.bodies == [TEST_FILE_PATH.read_bytes()]
+    assert read_threads and threading.get_ident() not in read_threads
+
+
+def test_multipart_upload_path():
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        result = helper.upload_test_execution_multipart(
+            TEST_FRAMEWORK, TEST_FILE_PATH, Path("tests/info.json")
+        )
+
+    assert result == {"key": "TC-1"}
+    assert TEST_FILE_PATH.read_bytes() in transport.bodies[0]
+    assert Path("tests/info.json").read_bytes() in transport.bodies[0]
+
+
+def test_concurrent_first_requests_authenticate_once():
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(
+                executor.map(
+                    lambda _: helper.upload_test_execution_text_data(
+                        TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+                    ),
+                    range(30),
+                )
+            )
+
+    assert all(results)
+    assert transport.auth_calls == 1
+
+
+def test_async_concurrent_first_requests_authenticate_once():
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return await asyncio.gather(
+                *[
+                    helper.upload_test_execution_text_data(
+                        TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+                    )
+                    for _ in range(30)
+                ]
+            )
+
+    transport = FakeAgiletest()
+    results = asyncio.run(main())
+
+    assert all(results)
+    assert transport.auth_calls == 1
+
+
+def test_token_without_expiry_authenticates_once_per_upload():
+    transport = FakeAgiletest(token_claims={"sub": "client-id"})
+    with make_helper(transport) as helper:
+        for _ in range(3):
+            helper.upload_test_execution_text_data(
+                TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+            )
+
+    assert transport.auth_calls == 3
+
+
+def test_prewarm_auth():
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        helper.prewarm_auth()
+        helper.prewarm_auth()
+        helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+        )
+
+    assert transport.auth_calls == 1
+
+
+@pytest.mark.parametrize(
+    "data_center, text_path, multipart_path",
+    [
+        (False, "/ds/test-executions/behave", "/ds/test-executions/behave/multipart"),
+        (
+            True,
+            "/rest/agiletest/1.0/test-executions/automation/behave",
+            "/plugins/servlet/agiletest/automation/multipart/behave",
+        ),
+    ],
+)
+def test_upload_routes(data_center: bool, text_path: str, multipart_path: str):
+    transport = FakeAgiletest()
+    with make_helper(transport) as helper:
+        helper.data_center = data_center
+        helper.upload_test_execution_text_data("Behave", TEST_PROJECT_KEY, "{}")
+        helper.upload_test_execution_multipart("behave", "{}", "{}")
+
+    assert [request.url.path for request in transport.uploads] == [
+        text_path,
+        multipart_path,
+    ]
+    assert transport.uploads[0].headers["Content-Type"] == "application/json"
+
+
+def test_async_upload_waits_for_retry_after():
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return [
+                await helper.upload_test_execution_text_data(
+                    TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+                )
+                for _ in range(3)
+            ]
+
+    transport = FakeAgiletest(upload_statuses=[429], retry_after="0.1")
+    results = asyncio.run(main())
+
+    assert results == [False, {"key": "TC-2"}, {"key": "TC-3"}]
+    first, second, third = transport.upload_times
+    assert second - first >= 0.09
+    assert third - second < 0.09
+
+
+def test_async_upload_caps_retry_after(monkeypatch, caplog):
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return [
+                await helper.upload_test_execution_text_data(
+                    TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+                )
+                for _ in range(2)
+            ]
+
+    monkeypatch.setattr("agiletest_cli.agiletest_client.MAX_RETRY_AFTER", 0.1)
+    transport = FakeAgiletest(upload_statuses=[429], retry_after="3600")
+    with caplog.at_level(logging.WARNING):
+        results = asyncio.run(main())
+
+    assert results == [False, {"key": "TC-2"}]
+    first, second = transport.upload_times
+    assert 0.09 <= second - first < 1
+    assert "backing off for 0.10s" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [
+        (make_token({"exp": 1700000000}), 1700000000),
+        (make_token({"exp": 1700000000.5}), 1700000000.5),
+        (make_token({"sub": "client-id"}), 0),
+        (make_token({"exp": None}), 0),
+        (make_token({"exp": "1700000000"}), 0),
+        (make_token({"exp": True}), 0),
+        ("a." + base64.urlsafe_b64encode(b"[1]").decode() + ".c", 0),
+        ("a.!!!.c", 0),
+        ("not-a-jwt", 0),
+        ("", 0),
+    ],
+)
+def test_parse_token_exp(token: str, expected: int | float):
+    assert _parse_token_exp(token) == expected
+
+
+def test_token_with_invalid_expiry_is_refreshed():
+    transport = FakeAgiletest(token_claims={"exp": None})
+    with make_helper(transport) as helper:
+        assert helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+        )
+        assert helper.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, "<testsuites/>"
+        )
+
+    assert transport.auth_calls == 2
+
+
+def test_async_multipart_many_keeps_order():
+    error = httpx.ConnectError("connection refused")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/apikeys/authenticate":
+            return httpx.Response(
+                200, text=make_token({"exp": int(time.time()) + 3600})
+            )
+        # answer by the upload in the body, whatever order the requests arrive in
+        upload = next(n for n in range(4) if f"id='{n}'".encode() in request.read())
+        if upload == 1:
+            return httpx.Response(500)
+        if upload == 2:
+            raise error
+        return httpx.Response(200, json={"key": f"TC-{upload}"})
+
+    async def main():
+        async with make_async_helper(httpx.MockTransport(handler)) as helper:
+            return await helper.upload_test_execution_multipart_many(
+                TEST_FRAMEWORK,
+                [(f"<testsuites id='{n}'/>", "{}") for n in range(4)],
+            )
+
+    results = asyncio.run(main())
+
+    assert results == [{"key": "TC-0"}, False, error, {"key": "TC-3"}]
+
+
+class SlowFakeAgiletest(FakeAgiletest):
+    """Answers after a short wait, so concurrent uploads overlap."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.001)
+        return await super().handle_async_request(request)
+
+
+def test_async_multipart_many_bounds_open_uploads(monkeypatch, tmp_path: Path):
+    open_uploads = 0
+    max_open_uploads = 0
+    open_upload_data = agiletest_client._open_upload_data
+
+    @contextlib.contextmanager
+    def counting_open_upload_data(data):
+        nonlocal open_uploads, max_open_uploads
+        open_uploads += 1
+        max_open_uploads = max(max_open_uploads, open_uploads)
+        try:
+            with open_upload_data(data) as content:
+                yield content
+        finally:
+            open_uploads -= 1
+
+    async def main():
+        async with make_async_helper(transport) as helper:
+            return await helper.upload_test_execution_multipart_many(
+                TEST_FRAMEWORK, [(results, info)] * 200, max_concurrency=5
+            )
+
+    monkeypatch.setattr(
+        agiletest_client, "_open_upload_data", counting_open_upload_data
+    )
+    results = tmp_path / "results.xml"
+    results.write_bytes(TEST_FILE_PATH.read_bytes())
+    info = tmp_path / "info.json"
+    info.write_bytes(b"{}")
+    transport = SlowFakeAgiletest()
+
+    assert all(asyncio.run(main()))
+    assert len(transport.uploads) == 200
+    # two files per upload
+    assert max_open_uploads == 5 * 2
+
+
+def test_async_multipart_many_rejects_zero_concurrency():
+    async def main():
+        async with make_async_helper(FakeAgiletest()) as helper:
+            await helper.upload_test_execution_multipart_many(
+                TEST_FRAMEWORK, [("<testsuites/>", "{}")], max_concurrency=0
+            )
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
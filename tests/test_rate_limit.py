@@ -1,10 +1,13 @@
-import concurrent.futures
-import pytest
-import subprocess
+import asyncio
+import functools
 import logging
+import threading
 import time
-import concurrent
-from agiletest_cli.agiletest_client import AgiletestHelper
+from pathlib import Path
+
+import pytest
+
+from agiletest_cli.agiletest_client import AgiletestHelper, AsyncAgiletestHelper
 from agiletest_cli.config import (
     AGILETEST_AUTH_BASE_URL,
     AGILETEST_BASE_URL,
@@ -18,12 +21,14 @@ FAILED_THRESHOLD = 20
 RATE_LIMIT = 100
 OVERHEAD = 50
 TOTAL_REQUESTS = RATE_LIMIT + OVERHEAD
-MAX_THREADS = 20
+# A quarter of the rate limit in flight still pushes all TOTAL_REQUESTS through
+# well within the throttling window, so the limit is exceeded and a 429 is hit.
+MAX_CONCURRENCY = RATE_LIMIT // 4
 TEST_FRAMEWORK = "junit"
 TEST_PROJECT_KEY = "TC"
 TEST_EXECUTION_KEY = "TC-202"
-TEST_FILE_PATH = "tests/junit-test-data.xml"
-TEST_FILE_DATA = open(TEST_FILE_PATH, "r").read()
+TEST_FILE_PATH = Path("tests/junit-test-data.xml")
+THROTTLED_MESSAGE = "429 Too Many Requests"
 
 
 logging.basicConfig(
@@ -33,59 +38,104 @@ logging.basicConfig(
 )
 
 
+@functools.cache
+def _test_file_bytes() -> bytes:
+    return TEST_FILE_PATH.read_bytes()
+
+
 def send_request(test_agiletest_object: AgiletestHelper) -> bool | dict:
-    return test_agiletest_object.upload_test_execution_text_xml(
-        TEST_FRAMEWORK, TEST_PROJECT_KEY, TEST_FILE_DATA, TEST_EXECUTION_KEY
+    return test_agiletest_object.upload_test_execution_text_data(
+        TEST_FRAMEWORK, TEST_PROJECT_KEY, TEST_FILE_PATH, TEST_EXECUTION_KEY
     )
 
 
-def is_throttled(caplog: pytest.LogCaptureFixture) -> bool:
-    records = caplog.get_records("call")
-    throttle_hit = False
-    for record in reversed(records):
-        if "429 Too Many Requests" in record.message:
-            throttle_hit = True
-            break
-    return throttle_hit
+async def send_request_async(
+    test_agiletest_object: AsyncAgiletestHelper,
+    semaphore: asyncio.Semaphore,
+    throttled: threading.Event,
+) -> bool | dict:
+    async with semaphore:
+        # once throttled, queued requests would only wait out Retry-After
+        if throttled.is_set():
+            return False
+        return await test_agiletest_object.upload_test_execution_text_data(
+            TEST_FRAMEWORK, TEST_PROJECT_KEY, _test_file_bytes(), TEST_EXECUTION_KEY
+        )
 
 
-@pytest.mark.rate_limit
-def test_request_under_rate_limit():
-    test_agiletest_object = AgiletestHelper(
+class ThrottleHandler(logging.Handler):
+    """Flag the first 429 as it is logged, instead of rescanning records."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.throttled = threading.Event()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.throttled.is_set() and THROTTLED_MESSAGE in record.getMessage():
+            self.throttled.set()
+
+
+@pytest.fixture
+def throttle_handler():
+    handler = ThrottleHandler()
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    yield handler
+    root_logger.removeHandler(handler)
+
+
+@pytest.fixture(scope="module")
+def agiletest_helper():
+    helper = AgiletestHelper(
         client_id=AGILETEST_CLIENT_ID,
         client_secret=AGILETEST_CLIENT_SECRET,
         base_url=AGILETEST_BASE_URL,
         base_auth_url=AGILETEST_AUTH_BASE_URL,
         timeout=DEFAULT_TIMEOUT,
     )
-    result = send_request(test_agiletest_object)
+    yield helper
+    helper.close()
+
+
+@pytest.mark.rate_limit
+def test_request_under_rate_limit(agiletest_helper: AgiletestHelper):
+    result = send_request(agiletest_helper)
     assert result, f"Command returned failed"
 
 
 @pytest.mark.rate_limit
-def test_api_throttling(caplog: pytest.LogCaptureFixture):
-    start_time = time.time()
-    time_ran = 0.0
-    with caplog.at_level(logging.ERROR):
-        test_agiletest_object = AgiletestHelper(
+def test_api_throttling(
+    caplog: pytest.LogCaptureFixture, throttle_handler: ThrottleHandler
+):
+    # the async client is bound to the event loop of this test, so it is
+    # created and closed here rather than shared through a fixture
+    async def main():
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        async with AsyncAgiletestHelper(
             client_id=AGILETEST_CLIENT_ID,
             client_secret=AGILETEST_CLIENT_SECRET,
             base_url=AGILETEST_BASE_URL,
             base_auth_url=AGILETEST_AUTH_BASE_URL,
             timeout=DEFAULT_TIMEOUT,
-        )
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            futures = {
-                executor.submit(send_request, test_agiletest_object)
-                for i in range(TOTAL_REQUESTS)
-            }
-
-            for future in concurrent.futures.as_completed(futures):
-                time_ran = time.time() - start_time
-                if time_ran >= 60:
-                    break
-                if future.result():
-                    break
+        ) as test_agiletest_object:
+            await test_agiletest_object.prewarm_auth()
+            await asyncio.gather(
+                *[
+                    send_request_async(
+                        test_agiletest_object, semaphore, throttle_handler.throttled
+                    )
+                    for _ in range(TOTAL_REQUESTS)
+                ]
+            )
+
+    start_time = time.time()
+    # only quiets the httpx/httpcore DEBUG records of every request, the 429 is
+    # logged at ERROR so it still reaches throttle_handler
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(main())
+    time_ran = time.time() - start_time
 
     assert time_ran < 60, "Test exceeded 60 seconds, stopped"
-    assert is_throttled(caplog), "Rate limit not hit, something else went wrong"
+    assert (
+        throttle_handler.throttled.is_set()
+    ), "Rate limit not hit, something else went wrong"